@@ -0,0 +1,178 @@
+# api\export.py
+"""
+Helpers for the bulk export endpoints: query building (filters + keyset paging)
+and streaming serialisation to NDJSON / CSV straight from a server-side cursor.
+"""
+import io
+import csv
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from . import database
+
+# Rows fetched per round trip from the server-side cursor (and per chunk sent to the client)
+EXPORT_BATCH_SIZE = 2000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Each dataset: SELECT list, FROM clause, keyset columns (must be unique together, in ORDER BY order).
+# Keysets only use fact table columns, covered by the index the dbt models create, so neither the
+# ORDER BY nor a resumed export (row comparison) has to sort the whole table first.
+DATASETS = {
+    "messages": {
+        "columns": [
+            "message_id", "channel_key", "channel_name", "message_date", "message_text",
+            "message_length", "has_media", "view_count", "forward_count",
+        ],
+        "select": """
+            f.message_id,
+            f.channel_key,
+            c.channel_name,
+            f.message_date,
+            f.message_text,
+            f.message_length,
+            f.has_media,
+            f.view_count,
+            f.forward_count
+        """,
+        "from": """
+            public_marts.fct_messages f
+            JOIN public_marts.dim_channels c ON f.channel_key = c.channel_key
+        """,
+        "date_column": "f.message_date",
+        "keyset": ["f.message_id", "f.channel_key"],
+    },
+    "detections": {
+        "columns": [
+            "message_id", "channel_key", "channel_name", "message_date", "image_category",
+            "confidence_score", "detected_objects",
+        ],
+        "select": """
+            i.message_id,
+            i.channel_key,
+            c.channel_name,
+            d.full_date as message_date,
+            i.image_category,
+            i.confidence_score,
+            i.detected_objects
+        """,
+        "from": """
+            public_marts.fct_image_detections i
+            JOIN public_marts.dim_channels c ON i.channel_key = c.channel_key
+            JOIN public_marts.dim_dates d ON i.date_key = d.date_key
+        """,
+        "date_column": "d.full_date",
+        # The mart joins detections to messages on message_id alone, so message_id is not unique
+        "keyset": ["i.message_id", "i.channel_key"],
+    },
+}
+
+
+def build_export_query(dataset, channel=None, start_date=None, end_date=None,
+                       after_id=None, after_channel_key=None, limit=None):
+    """
+    Returns (query, params) for one export.
+    Keyset paging: rows come ordered by (message_id, channel_key); pass the last row's
+    message_id and channel_key as after_id/after_channel_key to continue from there.
+    after_id alone continues with the next message_id.
+    """
+    spec = DATASETS[dataset]
+    conditions = []
+    params = {}
+
+    if channel:
+        conditions.append("c.channel_name = :channel")
+        params["channel"] = channel
+    if start_date:
+        conditions.append(f"{spec['date_column']} >= :start_date")
+        params["start_date"] = start_date
+    if end_date:
+        # Inclusive end date
+        conditions.append(f"{spec['date_column']} < :end_date")
+        params["end_date"] = end_date + timedelta(days=1)
+    if after_id is not None:
+        if after_channel_key is not None:
+            # Row comparison uses the composite (message_id, channel_key) ordering
+            conditions.append(f"({', '.join(spec['keyset'])}) > (:after_id, :after_channel_key)")
+            params["after_channel_key"] = after_channel_key
+        else:
+            conditions.append(f"{spec['keyset'][0]} > :after_id")
+        params["after_id"] = after_id
+
+    sql = f"SELECT {spec['select']} FROM {spec['from']}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(spec["keyset"])
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+
+    return text(sql), params
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def encode_ndjson(rows, columns):
+    """One JSON object per line."""
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows, columns=None):
+    """CSV chunk; pass columns to emit the header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if columns:
+        writer.writerow(columns)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, (date, datetime)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+def open_export(query, params):
+    """
+    Connects and executes the export query on a server-side cursor. Called before the response
+    starts, so connection and SQL errors still become a proper error response instead of a
+    truncated 200. Uses its own connection: the request's session is closed before streaming starts.
+    :return: (connection, result); stream_export closes the connection
+    """
+    connection = database.engine.connect()
+    try:
+        result = connection.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(query, params)
+    except Exception:
+        connection.close()
+        raise
+    return connection, result
+
+
+def stream_export(connection, result, columns, fmt, on_rows=None):
+    """
+    Generator for StreamingResponse over an open_export() result.
+    Only one batch is in memory at a time.
+    :param on_rows: Optional callback receiving the row count of every batch (metrics)
+    """
+    try:
+        if fmt == "csv":
+            yield encode_csv([], columns)
+        for rows in result.partitions():
+            if on_rows:
+                on_rows(len(rows))
+            yield encode_ndjson(rows, columns) if fmt == "ndjson" else encode_csv(rows)
+    finally:
+        connection.close()
@@ -1,10 +1,15 @@
 # api\main.py
-from fastapi import FastAPI, Depends, HTTPException
+import time
+from datetime import date
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional
 
-from . import database, schemas
+from src.metrics import REGISTRY
+from . import database, schemas, export
 
 app = FastAPI(
     title="Ethiopian Medical BizOps API",
@@ -12,35 +17,64 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Compress responses (including the streamed exports) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# --- Metrics (see src/metrics.py) ---
+REQUEST_SECONDS = REGISTRY.histogram(
+    'api_request_seconds',
+    'Request latency until response headers are sent (for streamed exports this excludes the body)',
+    ['endpoint', 'status']
+)
+QUERY_SECONDS = REGISTRY.histogram('api_query_seconds', 'Database query time per endpoint', ['endpoint'])
+EXPORT_ROWS = REGISTRY.counter('api_export_rows_total', 'Rows streamed by the export endpoints', ['dataset', 'format'])
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    # Unhandled exceptions propagate as a 500; record them too
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (e.g. /api/channels/{channel_name}/activity) to keep cardinality low
+        route = request.scope.get("route")
+        endpoint = route.path if route else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, status=status)
+
 # --- Endpoint 1: Top Frequently Mentioned Terms (Proxy for Products) ---
+# Shared with the batch endpoint.
+# Note: In a real production scenario, we would use a dedicated pre-computed table 
+# or a Postgres Full Text Search (tsvector) column for this.
+# This query splits text into words and counts them.
+# FIX 1: Added 'r' before the string to make it a raw string (fixes \s warning)
+# FIX 2: Renamed 'count' to 'frequency' to avoid conflict with Python's .count() method
+TOP_PRODUCTS_QUERY = text(r"""
+    SELECT 
+        word as term, 
+        COUNT(*) as frequency
+    FROM (
+        SELECT regexp_split_to_table(lower(message_text), '\s+') as word
+        FROM public_marts.fct_messages
+        WHERE message_text IS NOT NULL
+    ) t
+    WHERE length(word) > 4 
+      AND word NOT IN ('price', 'please', 'admin', 'telegram', 'contact', 'channel') 
+    GROUP BY word
+    ORDER BY frequency DESC
+    LIMIT :limit;
+""")
+
 @app.get("/api/reports/top-products", response_model=List[schemas.TrendingTerm])
 def get_top_products(limit: int = 10, db: Session = Depends(database.get_db)):
     """
     Returns the most frequent words in messages (excluding common stop words).
     Acts as a proxy for 'Top Products' mentioned.
     """
-    # Note: In a real production scenario, we would use a dedicated pre-computed table 
-    # or a Postgres Full Text Search (tsvector) column for this.
-    # This query splits text into words and counts them.
-    # FIX 1: Added 'r' before the string to make it a raw string (fixes \s warning)
-    # FIX 2: Renamed 'count' to 'frequency' to avoid conflict with Python's .count() method
-    query = text(r"""
-        SELECT 
-            word as term, 
-            COUNT(*) as frequency
-        FROM (
-            SELECT regexp_split_to_table(lower(message_text), '\s+') as word
-            FROM public_marts.fct_messages
-            WHERE message_text IS NOT NULL
-        ) t
-        WHERE length(word) > 4 
-          AND word NOT IN ('price', 'please', 'admin', 'telegram', 'contact', 'channel') 
-        GROUP BY word
-        ORDER BY frequency DESC
-        LIMIT :limit;
-    """)
-    
-    result = db.execute(query, {"limit": limit}).fetchall()
+    with QUERY_SECONDS.time(endpoint="/api/reports/top-products"):
+        result = db.execute(TOP_PRODUCTS_QUERY, {"limit": limit}).fetchall()
     
     # Map 'frequency' from DB to 'count' in Pydantic schema
     return [schemas.TrendingTerm(term=row.term, count=row.frequency) for row in result]
@@ -64,7 +98,8 @@ def get_channel_activity(channel_name: str, db: Session = Depends(database.get_d
         ORDER BY d.full_date DESC;
     """)
     
-    result = db.execute(query, {"channel_name": channel_name}).fetchall()
+    with QUERY_SECONDS.time(endpoint="/api/channels/{channel_name}/activity"):
+        result = db.execute(query, {"channel_name": channel_name}).fetchall()
     
     if not result:
         raise HTTPException(status_code=404, detail="Channel not found or no data available")
@@ -98,7 +133,8 @@ def search_messages(keyword: str, limit: int = 20, db: Session = Depends(databas
     
     # Add wildcards for ILIKE
     search_term = f"%{keyword}%"
-    result = db.execute(query, {"keyword": search_term, "limit": limit}).fetchall()
+    with QUERY_SECONDS.time(endpoint="/api/search/messages"):
+        result = db.execute(query, {"keyword": search_term, "limit": limit}).fetchall()
     
     return [
         schemas.MessageResponse(
@@ -129,7 +165,8 @@ def get_visual_stats(db: Session = Depends(database.get_db)):
         ORDER BY img_count DESC;
     """)
     
-    result = db.execute(query).fetchall()
+    with QUERY_SECONDS.time(endpoint="/api/reports/visual-content"):
+        result = db.execute(query).fetchall()
     
     return [
         schemas.VisualStat(
@@ -140,6 +177,135 @@ def get_visual_stats(db: Session = Depends(database.get_db)):
         for row in result
     ]
 
+# --- Endpoint 5: Batch Dashboard Query ---
+@app.post("/api/batch", response_class=ORJSONResponse)
+def get_batch_reports(request: schemas.BatchRequest, db: Session = Depends(database.get_db)):
+    """
+    Returns several reports for many channels in one round trip (one set-based query per report type).
+    - activity: daily post counts per channel
+    - visual-content: YOLO image category distribution per channel
+    - top-products: most frequent terms across all channels
+    Channels without data get an empty list instead of a 404.
+    Rows are serialized straight to JSON (orjson) without building a Pydantic model per row.
+    """
+    channels = list(dict.fromkeys(request.channels))
+    response = {}
+
+    if 'activity' in request.reports:
+        query = text("""
+            SELECT 
+                c.channel_name,
+                d.full_date as date,
+                COUNT(f.message_id) as post_count
+            FROM public_marts.fct_messages f
+            JOIN public_marts.dim_dates d ON f.date_key = d.date_key
+            JOIN public_marts.dim_channels c ON f.channel_key = c.channel_key
+            WHERE c.channel_name = ANY(:channels)
+            GROUP BY c.channel_name, d.full_date
+            ORDER BY c.channel_name, d.full_date DESC;
+        """)
+        with QUERY_SECONDS.time(endpoint="/api/batch"):
+            result = db.execute(query, {"channels": channels}).fetchall()
+        activity = {channel: [] for channel in channels}
+        for row in result:
+            activity[row.channel_name].append({"date": row.date, "post_count": row.post_count})
+        response['activity'] = activity
+
+    if 'visual-content' in request.reports:
+        query = text("""
+            SELECT 
+                c.channel_name,
+                i.image_category,
+                COUNT(*) as img_count,
+                ROUND(AVG(i.confidence_score), 2)::float as avg_confidence
+            FROM public_marts.fct_image_detections i
+            JOIN public_marts.dim_channels c ON i.channel_key = c.channel_key
+            WHERE c.channel_name = ANY(:channels)
+            GROUP BY c.channel_name, i.image_category
+            ORDER BY c.channel_name, img_count DESC;
+        """)
+        with QUERY_SECONDS.time(endpoint="/api/batch"):
+            result = db.execute(query, {"channels": channels}).fetchall()
+        visual = {channel: [] for channel in channels}
+        for row in result:
+            visual[row.channel_name].append({
+                "image_category": row.image_category,
+                "count": row.img_count,
+                "avg_confidence": row.avg_confidence,
+            })
+        response['visual_content'] = visual
+
+    if 'top-products' in request.reports:
+        with QUERY_SECONDS.time(endpoint="/api/batch"):
+            result = db.execute(TOP_PRODUCTS_QUERY, {"limit": request.top_products_limit}).fetchall()
+        response['top_products'] = [{"term": row.term, "count": row.frequency} for row in result]
+
+    return ORJSONResponse(response)
+
+# --- Endpoints 6 & 7: Bulk Export (streamed) ---
+def _export_response(dataset, fmt, channel, start_date, end_date, after_id, after_channel_key, limit):
+    if after_channel_key is not None and after_id is None:
+        raise HTTPException(status_code=422, detail="after_channel_key requires after_id")
+    query, params = export.build_export_query(
+        dataset, channel=channel, start_date=start_date, end_date=end_date,
+        after_id=after_id, after_channel_key=after_channel_key, limit=limit
+    )
+    # Run the query before the 200 is sent, so database errors are reported as errors
+    with QUERY_SECONDS.time(endpoint=f"/api/export/{dataset}"):
+        connection, result = export.open_export(query, params)
+    rows = export.stream_export(
+        connection, result, export.DATASETS[dataset]["columns"], fmt,
+        on_rows=lambda count: EXPORT_ROWS.inc(count, dataset=dataset, format=fmt)
+    )
+    return StreamingResponse(
+        rows,
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{fmt}"'}
+    )
+
+@app.get("/api/export/messages", response_class=StreamingResponse)
+def export_messages(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    channel: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after_id: Optional[int] = None,
+    after_channel_key: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    Streams fct_messages as NDJSON or CSV, ordered by (message_id, channel_key).
+    To resume an interrupted export, pass the last row's message_id / channel_key
+    as after_id / after_channel_key (after_id alone resumes at the next message_id).
+    Memory use does not depend on the export size.
+    """
+    return _export_response("messages", fmt, channel, start_date, end_date, after_id, after_channel_key, limit)
+
+@app.get("/api/export/detections", response_class=StreamingResponse)
+def export_detections(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    channel: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after_id: Optional[int] = None,
+    after_channel_key: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    Streams fct_image_detections as NDJSON or CSV, ordered by (message_id, channel_key).
+    To resume an interrupted export, pass the last row's message_id / channel_key
+    as after_id / after_channel_key (after_id alone resumes at the next message_id).
+    """
+    return _export_response("detections", fmt, channel, start_date, end_date, after_id, after_channel_key, limit)
+
+# --- Metrics ---
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus scrape endpoint: request latency and per-endpoint query time.
+    """
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # --- Root ---
 @app.get("/")
 def read_root():
@@ -1,7 +1,7 @@
 # api\schemas.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 # --- Schemas for Channel Activity ---
 class ChannelActivity(BaseModel):
@@ -29,4 +29,10 @@ class MessageResponse(BaseModel):
 class VisualStat(BaseModel):
     image_category: str
     count: int
-    avg_confidence: float
\ No newline at end of file
+    avg_confidence: float
+
+# --- Schemas for the Batch Dashboard Query ---
+class BatchRequest(BaseModel):
+    channels: List[str] = Field(default=[], max_length=200)
+    reports: List[Literal['activity', 'visual-content', 'top-products']] = ['activity', 'visual-content']
+    top_products_limit: int = Field(default=10, ge=1, le=100)
\ No newline at end of file
@@ -1,3 +1,9 @@
+-- Index for the API's keyset-paged exports (ORDER BY / row comparison on message_id, channel_key).
+-- Unnamed, so it cannot clash with the index on the __dbt_backup table during the swap.
+{{ config(
+    post_hook="create index on {{ this }} (message_id, channel_key)"
+) }}
+
 with detections as (
     select * from {{ ref('stg_yolo_detections') }}
 ),
@@ -1,12 +1,17 @@
 import os
 import sys 
+import time
 import subprocess
 from dagster import op, job, schedule, Definitions, RunConfig
 from dotenv import load_dotenv
 
+from src.metrics import REGISTRY
+
 # --- CRITICAL: Execute this function to load variables ---
 load_dotenv() 
 
+DBT_SECONDS = REGISTRY.histogram('dbt_build_seconds', 'Duration of dbt build', buckets=(10, 30, 60, 120, 300, 600, 1800))
+
 @op
 def scrape_telegram_data():
     """
@@ -62,6 +67,8 @@ def run_dbt_transformations(start_flag: str):
     
     # FIX: Added "--profiles-dir", "medical_warehouse"
     # This tells dbt to look for profiles.yml in the local folder, not the user home folder.
+    REGISTRY.reset()
+    start = time.perf_counter()
     result = subprocess.run(
         [
             "dbt", "build", 
@@ -72,6 +79,8 @@ def run_dbt_transformations(start_flag: str):
         text=True,
         env=os.environ.copy()
     )
+    DBT_SECONDS.observe(time.perf_counter() - start)
+    print(f"Metrics saved to: {REGISTRY.write_run_file('dbt')}")
     
     if result.returncode != 0:
         raise Exception(f"dbt failed: {result.stderr}")
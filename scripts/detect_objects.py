@@ -7,11 +7,14 @@ import pandas as pd
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.yolo_detect import ObjectDetector
+from src.metrics import REGISTRY, profile_run
+from src.media_manifest import MediaManifest
 
 def main():
     # Define paths
     project_root = os.path.dirname(os.path.dirname(__file__))
     images_dir = os.path.join(project_root, 'data', 'raw', 'images')
+    manifest_path = os.path.join(project_root, 'data', 'raw', 'media_manifest.sqlite3')
     output_dir = os.path.join(project_root, 'data', 'processed')
     output_file = os.path.join(output_dir, 'yolo_results.csv')
 
@@ -20,9 +23,13 @@ def main():
 
     print("--- Starting YOLO Object Detection ---")
     detector = ObjectDetector()
+    # Enumerate images from the manifest maintained by the scraper instead of walking the tree
+    manifest = MediaManifest(manifest_path, images_dir=images_dir)
     
     # Run detection
-    df = detector.process_images(images_dir)
+    with profile_run('detect_objects'):
+        df = detector.process_images(images_dir, manifest=manifest)
+    manifest.close()
     
     if not df.empty:
         print(f"\nDetection complete. Processed {len(df)} images.")
@@ -35,5 +42,7 @@ def main():
     else:
         print("No images processed. Check your data/raw/images directory.")
 
+    print(f"Metrics saved to: {REGISTRY.write_run_file('detect_objects')}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
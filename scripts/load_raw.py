@@ -1,9 +1,16 @@
 import os
+import sys
 import json
+import time
 import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
+# Add the project root to the python path so we can import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import REGISTRY, profile_run
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +24,20 @@ DB_PORT = os.getenv("POSTGRES_PORT", "5432")
 # Connection String
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Hot-path metrics (see src/metrics.py)
+ROWS_TOTAL = REGISTRY.counter('loader_rows_total', 'Rows upserted into the raw schema', ['table'])
+ROWS_PER_SECOND = REGISTRY.gauge('loader_rows_per_second', 'Rows/sec of the last load', ['table'])
+LOAD_SECONDS = REGISTRY.histogram('loader_seconds', 'Time per loader phase', ['table', 'phase'])
+
+
+def record_load(table, rows, read_seconds, write_seconds):
+    """Records one loader run: file parsing time, to_sql + upsert time and rows/sec."""
+    LOAD_SECONDS.observe(read_seconds, table=table, phase='read')
+    LOAD_SECONDS.observe(write_seconds, table=table, phase='write')
+    ROWS_TOTAL.inc(rows, table=table)
+    total_seconds = read_seconds + write_seconds
+    ROWS_PER_SECOND.set(round(rows / total_seconds, 2) if total_seconds > 0 else 0, table=table)
+
 def create_raw_schema(engine):
     """Creates the 'raw' schema and tables."""
     with engine.connect() as connection:
@@ -58,6 +79,7 @@ def load_json_to_postgres(engine):
     """Iterates over JSON files and loads them into Postgres."""
     base_path = "data/raw/telegram_messages"
     
+    read_start = time.perf_counter()
     all_messages = []
     
     # Walk through the directory structure
@@ -83,6 +105,8 @@ def load_json_to_postgres(engine):
     # Ensure correct types
     df['message_date'] = pd.to_datetime(df['message_date'])
     df['scraped_at'] = pd.to_datetime(df['scraped_at'])
+    read_seconds = time.perf_counter() - read_start
+    write_start = time.perf_counter()
     
     # Upsert Logic using temporary table (standard efficient pattern)
     with engine.connect() as connection:
@@ -109,6 +133,7 @@ def load_json_to_postgres(engine):
         connection.execute(text(upsert_query))
         connection.commit()
         
+    record_load('telegram_messages', len(df), read_seconds, time.perf_counter() - write_start)
     print(f"Successfully processed {len(df)} records.")
 def load_yolo_to_postgres(engine):
     """Loads the YOLO results CSV into Postgres."""
@@ -119,12 +144,15 @@ def load_yolo_to_postgres(engine):
         return
 
     print("Loading YOLO results...")
+    read_start = time.perf_counter()
     df = pd.read_csv(csv_path)
     
     # Clean data
     df['message_id'] = pd.to_numeric(df['message_id'], errors='coerce')
     df = df.dropna(subset=['message_id'])
     df['message_id'] = df['message_id'].astype(int)
+    read_seconds = time.perf_counter() - read_start
+    write_start = time.perf_counter()
 
     with engine.connect() as connection:
         df.to_sql('temp_yolo', connection, if_exists='replace', index=False)
@@ -142,10 +170,13 @@ def load_yolo_to_postgres(engine):
         connection.execute(text(upsert_query))
         connection.commit()
     
+    record_load('yolo_detections', len(df), read_seconds, time.perf_counter() - write_start)
     print(f"Successfully processed {len(df)} YOLO detections.")
 
 if __name__ == "__main__":
     engine = create_engine(DATABASE_URL)
-    create_raw_schema(engine)
-    load_json_to_postgres(engine)
-    load_yolo_to_postgres(engine)
\ No newline at end of file
+    with profile_run('load_raw'):
+        create_raw_schema(engine)
+        load_json_to_postgres(engine)
+        load_yolo_to_postgres(engine)
+    print(f"Metrics saved to: {REGISTRY.write_run_file('load_raw')}")
\ No newline at end of file
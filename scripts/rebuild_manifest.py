@@ -0,0 +1,25 @@
+# scripts/rebuild_manifest.py
+import sys
+import os
+
+# Add the project root to the python path so we can import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.media_manifest import MediaManifest
+
+def main():
+    # Same paths as the scraper and detect_objects.py
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    images_dir = os.path.join(project_root, 'data', 'raw', 'images')
+    manifest_path = os.path.join(project_root, 'data', 'raw', 'media_manifest.sqlite3')
+
+    print("--- Rebuilding media manifest ---")
+    manifest = MediaManifest(manifest_path, images_dir=None)
+    previous = len(manifest)
+    indexed = manifest.rebuild(images_dir)
+    manifest.close()
+
+    print(f"Indexed {indexed} images from {images_dir} (previously {previous} entries).")
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.scraper import TelegramScraper
+from src.metrics import REGISTRY, profile_run
 
 # Load secrets
 load_dotenv()
@@ -28,13 +29,15 @@ async def main():
     try:
         await scraper.connect()
         
-        for channel in CHANNELS:
-            # Extract username from URL if necessary
-            handle = channel.split('/')[-1]
-            await scraper.scrape_channel(handle, limit=500) # Start small with 500
+        with profile_run('scrape_data'):
+            for channel in CHANNELS:
+                # Extract username from URL if necessary
+                handle = channel.split('/')[-1]
+                await scraper.scrape_channel(handle, limit=500) # Start small with 500
             
     finally:
         scraper.close()
+        print(f"Metrics saved to: {REGISTRY.write_run_file('scrape_data')}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
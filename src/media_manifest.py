@@ -0,0 +1,201 @@
+# src/media_manifest.py
+import os
+import sqlite3
+import hashlib
+from datetime import datetime
+
+
+class MediaManifest:
+    def __init__(self, db_path='data/raw/media_manifest.sqlite3', images_dir='data/raw/images'):
+        """
+        Persistent index of every downloaded image: channel, message_id, path, size, hash, download time.
+
+        The whole index is loaded into memory, so "do we already have this photo?" is a dict
+        lookup instead of an os.path.exists() call, and detection can enumerate images without
+        walking the directory tree. New entries are buffered and written with flush().
+
+        A new manifest is bootstrapped once from the existing images_dir.
+
+        Paths are stored relative to the manifest's directory (e.g. 'images/chemed/12.jpg'), so the
+        scraper (cwd-relative paths) and detect_objects.py (absolute paths) read and write the same
+        rows. In memory they are resolved against that directory again.
+
+        Entries are trusted, not re-checked against the filesystem: a photo deleted from disk
+        is neither re-downloaded nor skipped by detection until it is removed with remove()
+        (process_images does this when it hits a missing file) or the manifest is rebuilt
+        from the images directory (scripts/rebuild_manifest.py).
+        """
+        self.db_path = db_path
+        self.base_dir = os.path.dirname(db_path)
+        is_new = not os.path.exists(db_path)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS media (
+                channel TEXT NOT NULL,
+                message_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER,
+                hash TEXT,
+                downloaded_at TEXT,
+                PRIMARY KEY (channel, message_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_media_hash ON media (hash)")
+        self.conn.commit()
+
+        # { (channel, message_id): entry }
+        self.entries = {}
+        # { hash: [entry, ...] } -- the same photo forwarded between channels shares a hash
+        self.by_hash = {}
+        self._pending = []
+        # Keys removed since the last flush()
+        self._removed = set()
+
+        rows = self.conn.execute("SELECT channel, message_id, path, size, hash, downloaded_at FROM media")
+        for channel, message_id, path, size, file_hash, downloaded_at in rows:
+            self._index({
+                'channel': channel,
+                'message_id': message_id,
+                'path': os.path.join(self.base_dir, path),
+                'size': size,
+                'hash': file_hash,
+                'downloaded_at': downloaded_at,
+            })
+
+        if is_new and images_dir and os.path.isdir(images_dir):
+            self.import_directory(images_dir)
+
+    @staticmethod
+    def hash_bytes(data):
+        """Short content hash (128-bit BLAKE2b) used to spot identical photos."""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _relative(self, path):
+        """The stored form of a path: relative to the manifest's directory."""
+        return os.path.relpath(path, self.base_dir or '.')
+
+    def _unindex(self, key):
+        previous = self.entries.pop(key, None)
+        if previous is not None and previous['hash'] in self.by_hash:
+            self.by_hash[previous['hash']].remove(previous)
+            if not self.by_hash[previous['hash']]:
+                del self.by_hash[previous['hash']]
+        return previous
+
+    def _index(self, entry):
+        self._unindex((entry['channel'], entry['message_id']))
+        self.entries[(entry['channel'], entry['message_id'])] = entry
+        if entry['hash']:
+            self.by_hash.setdefault(entry['hash'], []).append(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        """Usage: (channel, message_id) in manifest"""
+        return key in self.entries
+
+    def get(self, channel, message_id):
+        return self.entries.get((channel, message_id))
+
+    def add(self, channel, message_id, path, data=None, size=None, file_hash=None, downloaded_at=None):
+        """
+        Records an image. Pass the downloaded bytes as 'data' to compute size and hash
+        without touching the filesystem again.
+        """
+        if data is not None:
+            size = len(data)
+            file_hash = self.hash_bytes(data)
+        entry = {
+            'channel': channel,
+            'message_id': int(message_id),
+            'path': os.path.join(self.base_dir, self._relative(path)),
+            'size': size,
+            'hash': file_hash,
+            'downloaded_at': downloaded_at or datetime.now().isoformat(),
+        }
+        self._index(entry)
+        self._pending.append(entry)
+        self._removed.discard((entry['channel'], entry['message_id']))
+        return entry
+
+    def remove(self, channel, message_id):
+        """
+        Forgets an image (e.g. its file was deleted), so the scraper downloads it again.
+        Returns the removed entry, or None if it was not in the manifest.
+        """
+        key = (channel, int(message_id))
+        entry = self._unindex(key)
+        if entry is not None:
+            self._pending = [e for e in self._pending if (e['channel'], e['message_id']) != key]
+            self._removed.add(key)
+        return entry
+
+    def flush(self):
+        """Writes buffered entries and removals to disk in one transaction."""
+        if not self._pending and not self._removed:
+            return
+        self.conn.executemany("DELETE FROM media WHERE channel = ? AND message_id = ?", list(self._removed))
+        self.conn.executemany(
+            """
+            INSERT INTO media (channel, message_id, path, size, hash, downloaded_at)
+            VALUES (:channel, :message_id, :path, :size, :hash, :downloaded_at)
+            ON CONFLICT (channel, message_id) DO UPDATE SET
+                path = excluded.path,
+                size = excluded.size,
+                hash = excluded.hash,
+                downloaded_at = excluded.downloaded_at
+            """,
+            [dict(entry, path=self._relative(entry['path'])) for entry in self._pending],
+        )
+        self.conn.commit()
+        self._pending = []
+        self._removed = set()
+
+    def iter_entries(self, channel=None):
+        for entry in self.entries.values():
+            if channel is None or entry['channel'] == channel:
+                yield entry
+
+    def duplicates(self):
+        """Returns { hash: [entries] } for photos stored more than once (e.g. forwarded between channels)."""
+        return {file_hash: entries for file_hash, entries in self.by_hash.items() if len(entries) > 1}
+
+    def import_directory(self, images_dir):
+        """
+        One-off bootstrap from an existing data/raw/images/{channel}/{msg_id}.jpg tree.
+        Reads every file once to hash it; afterwards the manifest is kept up to date by the scraper.
+        """
+        imported = 0
+        for root, _, files in os.walk(images_dir):
+            for file in files:
+                stem, ext = os.path.splitext(file)
+                if ext.lower() not in ('.jpg', '.jpeg', '.png') or not stem.isdigit():
+                    continue
+                file_path = os.path.join(root, file)
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                downloaded_at = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+                self.add(os.path.basename(root), int(stem), file_path, data=data, downloaded_at=downloaded_at)
+                imported += 1
+        self.flush()
+        return imported
+
+    def rebuild(self, images_dir):
+        """
+        Drops every entry and re-imports images_dir. Use after files were moved or deleted by hand.
+        Returns the number of images indexed.
+        """
+        self.conn.execute("DELETE FROM media")
+        self.conn.commit()
+        self.entries = {}
+        self.by_hash = {}
+        self._pending = []
+        self._removed = set()
+        return self.import_directory(images_dir)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,263 @@
+# src/metrics.py
+"""
+Lightweight in-process metrics shared by the scraper, detector, loader and API.
+
+- Counter / Gauge / Histogram with labels, safe to use from threads (FastAPI runs
+  sync endpoints in a thread pool).
+- REGISTRY.render_prometheus() produces the Prometheus text format for /metrics.
+- REGISTRY.write_run_file(stage) dumps a JSON snapshot for batch stages
+  (logs/metrics/{stage}_{timestamp}.json).
+- profile_run(stage) is an optional sampling profiler, enabled with PIPELINE_PROFILE=1.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import Counter as _StackCounter
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_DIR = os.path.join('logs', 'metrics')
+
+# Latency buckets in seconds (1ms .. 60s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        escaped = [(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing total (messages scraped, bytes downloaded, rows loaded...)."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        with self._lock:
+            return [{'labels': dict(zip(self.labelnames, key)), 'value': value} for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down (e.g. the last run's rows/sec)."""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations (latencies), stored as cumulative buckets + sum + count."""
+    kind = 'histogram'
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            # bisect_left: a value equal to a bound belongs to that bucket (le = "less or equal")
+            state['counts'][bisect_left(self.buckets, value)] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the 'with' block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', repr(float(bound))))} {cumulative}")
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', '+Inf'))} {state['count']}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {state['sum']}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {state['count']}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    'labels': dict(zip(self.labelnames, key)),
+                    'count': state['count'],
+                    'sum': round(state['sum'], 6),
+                    'mean': round(state['sum'] / state['count'], 6) if state['count'] else None,
+                    'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], state['counts'])),
+                }
+                for key, state in sorted(self._values.items())
+            ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+
+    def _register(self, cls, name, description, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, description, labelnames=()):
+        return self._register(Counter, name, description, labelnames)
+
+    def gauge(self, name, description, labelnames=()):
+        return self._register(Gauge, name, description, labelnames)
+
+    def histogram(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, description, labelnames, buckets=buckets)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        return {
+            name: {'type': metric.kind, 'description': metric.description, 'values': metric.snapshot()}
+            for name, metric in sorted(self._metrics.items())
+        }
+
+    def write_run_file(self, stage, directory=METRICS_DIR):
+        """Writes every metric recorded in this process to logs/metrics/{stage}_{timestamp}.json."""
+        os.makedirs(directory, exist_ok=True)
+        finished_at = datetime.now()
+        file_path = os.path.join(directory, f"{stage}_{finished_at.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'stage': stage,
+                'started_at': self.started_at.isoformat(),
+                'finished_at': finished_at.isoformat(),
+                'duration_seconds': round((finished_at - self.started_at).total_seconds(), 3),
+                'metrics': self.snapshot(),
+            }, f, indent=4)
+        return file_path
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+        self.started_at = datetime.now()
+
+
+# Process-wide registry used by every stage
+REGISTRY = MetricsRegistry()
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread every 'interval' seconds from a background thread
+    and aggregates them in the "folded" format understood by flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, interval=0.01, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = _StackCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_run(stage, directory=METRICS_DIR):
+    """
+    Profiles the 'with' block when the PIPELINE_PROFILE environment variable is set.
+    Output: logs/metrics/{stage}_{timestamp}.folded
+    PIPELINE_PROFILE_INTERVAL overrides the sampling interval (seconds, default 0.01).
+    """
+    if not os.getenv('PIPELINE_PROFILE'):
+        yield None
+        return
+
+    profiler = SamplingProfiler(interval=float(os.getenv('PIPELINE_PROFILE_INTERVAL', '0.01')))
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        os.makedirs(directory, exist_ok=True)
+        profiler.write(os.path.join(directory, f"{stage}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"))
@@ -0,0 +1,210 @@
+# src/request_scheduler.py
+"""
+Rate-limited, FloodWait-aware wrapper around Telethon client calls.
+
+One RequestScheduler per Telegram account (i.e. per TelegramClient):
+- Token buckets cap the request rate for API calls and photo downloads separately.
+- FloodWaitError is honoured: we sleep for the requested duration and retry the same call,
+  so callers can resume from where they were instead of restarting.
+- Page size (API flood waits) and download concurrency (download flood waits) adapt (AIMD):
+  halved once per flood wait episode, grown back slowly after a streak of successful calls.
+"""
+import time
+import asyncio
+import logging
+
+from telethon.errors import FloodWaitError
+
+from src.metrics import REGISTRY
+
+FLOOD_WAITS_TOTAL = REGISTRY.counter('scheduler_flood_waits_total', 'FloodWaitError responses from Telegram', ['kind'])
+FLOOD_WAIT_SECONDS = REGISTRY.counter('scheduler_flood_wait_seconds_total', 'Seconds slept because of flood waits', ['kind'])
+THROTTLE_SECONDS = REGISTRY.counter('scheduler_throttle_seconds_total', 'Seconds spent waiting on the token bucket', ['kind'])
+PAGE_SIZE = REGISTRY.gauge('scheduler_page_size', 'Current message page size')
+DOWNLOAD_CONCURRENCY = REGISTRY.gauge('scheduler_download_concurrency', 'Current number of parallel photo downloads')
+
+
+class FloodWaitExceeded(Exception):
+    """Raised when Telegram asks us to wait longer than we are willing to (or retries run out)."""
+
+    def __init__(self, seconds, kind, attempts=None):
+        """
+        :param seconds: The flood wait Telegram last asked for
+        :param attempts: Set when retries ran out rather than the wait being too long
+        """
+        if attempts:
+            message = f"Still flood-waited ({seconds}s) on '{kind}' requests after {attempts} attempts"
+        else:
+            message = f"Flood wait of {seconds}s on '{kind}' requests exceeds the allowed limit"
+        super().__init__(message)
+        self.seconds = seconds
+        self.kind = kind
+        self.attempts = attempts
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        :param rate: Tokens added per second (sustained requests/sec)
+        :param capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        # updated_at lies in the future while the bucket is paused
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def pause(self, seconds):
+        """Empties the bucket and adds no tokens for 'seconds' (e.g. while a flood wait lasts)."""
+        self.tokens = min(self.tokens, 0)
+        self.updated_at = max(self.updated_at, time.monotonic() + seconds)
+
+    async def acquire(self, tokens=1):
+        """
+        Takes 'tokens', waiting until they have been refilled if the bucket runs short.
+        Returns the seconds spent waiting.
+        """
+        self._refill()
+        # Take the tokens up front (the balance may go negative) so concurrent callers
+        # queue behind each other, then sleep once for the deficit
+        self.tokens -= tokens
+        if self.tokens >= 0:
+            return 0.0
+        paused = max(0.0, self.updated_at - time.monotonic())
+        delay = paused + -self.tokens / self.rate
+        await asyncio.sleep(delay)
+        return delay
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        requests_per_second=1.0,
+        downloads_per_second=3.0,
+        burst=5,
+        page_size=100,
+        min_page_size=20,
+        max_page_size=100,
+        download_concurrency=4,
+        max_download_concurrency=8,
+        max_flood_wait=300,
+        max_retries=5,
+        recovery_streak=20,
+    ):
+        """
+        :param requests_per_second: Sustained rate for API calls (get_entity, get_messages)
+        :param downloads_per_second: Sustained rate for photo downloads
+        :param max_page_size: Telegram returns at most 100 messages per GetHistory request
+        :param max_flood_wait: Longest flood wait (seconds) we sleep through before giving up
+        :param recovery_streak: Successful calls needed before page size / concurrency grow again
+        """
+        self.buckets = {
+            'api': TokenBucket(requests_per_second, burst),
+            'download': TokenBucket(downloads_per_second, burst),
+        }
+        self.base_rates = {kind: bucket.rate for kind, bucket in self.buckets.items()}
+        self.page_size = page_size
+        self.min_page_size = min_page_size
+        self.max_page_size = max_page_size
+        self.download_concurrency = download_concurrency
+        self.max_download_concurrency = max_download_concurrency
+        self.max_flood_wait = max_flood_wait
+        self.max_retries = max_retries
+        self.recovery_streak = recovery_streak
+        self._streaks = {kind: 0 for kind in self.buckets}
+        # Until when (monotonic) the current flood wait episode of each kind lasts
+        self._backoff_until = {kind: 0.0 for kind in self.buckets}
+        PAGE_SIZE.set(self.page_size)
+        DOWNLOAD_CONCURRENCY.set(self.download_concurrency)
+
+    def _on_flood_wait(self, seconds, kind):
+        FLOOD_WAITS_TOTAL.inc(kind=kind)
+        self._streaks[kind] = 0
+        bucket = self.buckets[kind]
+        # No tokens until the wait is over, then refill at the (reduced) rate instead of a full burst
+        bucket.pause(seconds + 1)
+
+        # Calls already in flight when Telegram complained (e.g. the rest of a download batch)
+        # report the same flood wait: back off once per episode, not once per call
+        now = time.monotonic()
+        if now < self._backoff_until[kind]:
+            self._backoff_until[kind] = max(self._backoff_until[kind], now + seconds + 1)
+            return
+        self._backoff_until[kind] = now + seconds + 1
+
+        # Multiplicative decrease: back off hard as soon as Telegram complains
+        if kind == 'api':
+            self.page_size = max(self.min_page_size, self.page_size // 2)
+        else:
+            self.download_concurrency = max(1, self.download_concurrency // 2)
+        bucket.rate = max(self.base_rates[kind] / 8, bucket.rate / 2)
+        PAGE_SIZE.set(self.page_size)
+        DOWNLOAD_CONCURRENCY.set(self.download_concurrency)
+        logging.warning(
+            f"Flood wait of {seconds}s on '{kind}' requests. "
+            f"page_size={self.page_size}, download_concurrency={self.download_concurrency}, rate={bucket.rate:.2f}/s"
+        )
+
+    def _on_success(self, kind):
+        # Additive increase: recover slowly once calls keep succeeding
+        self._streaks[kind] += 1
+        if self._streaks[kind] < self.recovery_streak:
+            return
+        self._streaks[kind] = 0
+        if kind == 'api':
+            self.page_size = min(self.max_page_size, self.page_size + 10)
+        else:
+            self.download_concurrency = min(self.max_download_concurrency, self.download_concurrency + 1)
+        bucket = self.buckets[kind]
+        bucket.rate = min(self.base_rates[kind], bucket.rate * 1.25)
+        PAGE_SIZE.set(self.page_size)
+        DOWNLOAD_CONCURRENCY.set(self.download_concurrency)
+
+    async def call(self, func, *args, kind='api', **kwargs):
+        """
+        Awaits func(*args, **kwargs) under the rate limit for 'kind' ('api' or 'download'),
+        sleeping through flood waits and retrying the identical call.
+        """
+        last_wait = None
+        for _ in range(self.max_retries + 1):
+            THROTTLE_SECONDS.inc(await self.buckets[kind].acquire(), kind=kind)
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWaitError as e:
+                self._on_flood_wait(e.seconds, kind)
+                if e.seconds > self.max_flood_wait:
+                    raise FloodWaitExceeded(e.seconds, kind) from e
+                last_wait = e.seconds
+                FLOOD_WAIT_SECONDS.inc(e.seconds + 1, kind=kind)
+                await asyncio.sleep(e.seconds + 1)
+                continue
+            self._on_success(kind)
+            return result
+
+        raise FloodWaitExceeded(last_wait, kind, attempts=self.max_retries + 1)
+
+    async def run_downloads(self, jobs):
+        """
+        Runs download coroutine factories in batches of the current download concurrency.
+        Returns results in order; a failed download yields its exception instead of a result,
+        except FloodWaitExceeded which is re-raised so the caller can stop the scrape.
+        """
+        results = []
+        index = 0
+        while index < len(jobs):
+            batch = jobs[index:index + self.download_concurrency]
+            index += len(batch)
+            batch_results = await asyncio.gather(
+                *(self.call(job, kind='download') for job in batch), return_exceptions=True
+            )
+            for result in batch_results:
+                if isinstance(result, FloodWaitExceeded):
+                    raise result
+            results.extend(batch_results)
+        return results
@@ -6,8 +6,13 @@ from datetime import datetime
 from telethon import TelegramClient
 from telethon.tl.types import MessageMediaPhoto
 import asyncio
+import time
 from tqdm import tqdm
 
+from src.metrics import REGISTRY
+from src.request_scheduler import RequestScheduler
+from src.media_manifest import MediaManifest
+
 # Configure Logging
 os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
@@ -16,12 +21,38 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Hot-path metrics (see src/metrics.py)
+MESSAGES_TOTAL = REGISTRY.counter('scraper_messages_total', 'Messages scraped', ['channel'])
+MESSAGES_PER_SECOND = REGISTRY.gauge('scraper_messages_per_second', 'Messages/sec of the last scrape', ['channel'])
+FETCH_SECONDS = REGISTRY.counter('scraper_fetch_seconds_total', 'Time spent waiting on Telegram message paging', ['channel'])
+DOWNLOAD_BYTES = REGISTRY.counter('scraper_download_bytes_total', 'Photo bytes downloaded', ['channel'])
+DOWNLOAD_SECONDS = REGISTRY.histogram('scraper_download_seconds', 'Photo download latency', ['channel'])
+DOWNLOAD_BYTES_PER_SECOND = REGISTRY.gauge(
+    'scraper_download_bytes_per_second', 'Download bytes/sec of the last scrape (wall clock, all concurrent downloads)', ['channel']
+)
+SAVE_SECONDS = REGISTRY.histogram('scraper_save_seconds', 'Time spent writing JSON files', ['channel'])
+ERRORS_TOTAL = REGISTRY.counter('scraper_errors_total', 'Channel scrapes aborted by an error', ['channel'])
+
 class TelegramScraper:
-    def __init__(self, api_id, api_hash, phone_number):
-        self.client = TelegramClient('medical_scraper_session', api_id, api_hash)
+    def __init__(self, api_id, api_hash, phone_number, scheduler=None, manifest=None):
+        # flood_sleep_threshold=0: let every flood wait reach the scheduler instead of
+        # Telethon silently sleeping through the short ones, so it can adapt its rates.
+        self.client = TelegramClient('medical_scraper_session', api_id, api_hash, flood_sleep_threshold=0)
         self.phone_number = phone_number
+        self.scheduler = scheduler or RequestScheduler()
         self.raw_data_path = 'data/raw/telegram_messages'
         self.images_path = 'data/raw/images'
+        # In-memory index of downloaded photos: replaces per-message os.path.exists() probes.
+        # Opened on first use, so constructing a scraper never creates data/raw/media_manifest.sqlite3.
+        self._manifest = manifest
+        # Image directories already created in this run (avoids an os.makedirs() per photo)
+        self._image_dirs = set()
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = MediaManifest(images_dir=self.images_path)
+        return self._manifest
 
     async def connect(self):
         """Connect to the Telegram Client."""
@@ -39,12 +70,31 @@ class TelegramScraper:
     def _get_image_path(self, channel_name, message_id):
         """Generate path for image storage: data/raw/images/channel/msg_id.jpg"""
         dir_path = os.path.join(self.images_path, channel_name)
-        os.makedirs(dir_path, exist_ok=True)
+        if dir_path not in self._image_dirs:
+            os.makedirs(dir_path, exist_ok=True)
+            self._image_dirs.add(dir_path)
         return os.path.join(dir_path, f"{message_id}.jpg")
 
+    async def _download_photo(self, message, img_save_path, channel_handle):
+        """Downloads one photo, writes it and adds it to the manifest. Returns (bytes, seconds)."""
+        download_start = time.perf_counter()
+        # Download to memory so size and hash come for free (no stat/re-read of the file)
+        data = await self.client.download_media(message.photo, file=bytes)
+        elapsed = time.perf_counter() - download_start
+        with open(img_save_path, 'wb') as f:
+            f.write(data)
+        self.manifest.add(channel_handle, message.id, img_save_path, data=data)
+        size = len(data)
+        DOWNLOAD_SECONDS.observe(elapsed, channel=channel_handle)
+        DOWNLOAD_BYTES.inc(size, channel=channel_handle)
+        return size, elapsed
+
     async def scrape_channel(self, channel_handle, limit=1000):
         """
         Scrape messages from a specific channel.
+        Messages are fetched page by page (newest first) through the request scheduler,
+        so a flood wait resumes from the last processed message instead of restarting.
+        If the scrape is cut short, everything collected so far is still saved.
         :param channel_handle: The telegram handle (e.g., 'tikvahpharma')
         :param limit: Max messages to scrape (None for all)
         """
@@ -54,54 +104,109 @@ class TelegramScraper:
         # Dictionary to group messages by date for batch saving
         # Structure: { '2024-01-14': [msg1, msg2], ... }
         data_by_date = {}
+        scrape_start = time.perf_counter()
+        message_count = 0
+        download_bytes = 0
+        # Wall-clock time spent in run_downloads (downloads overlap, so per-download latencies would over-count)
+        download_seconds = 0.0
 
         try:
-            entity = await self.client.get_entity(channel_handle)
-            # Iterate through messages
-            async for message in self.client.iter_messages(entity, limit=limit):
-                if not message.date:
-                    continue
+            entity = await self.scheduler.call(self.client.get_entity, channel_handle)
+
+            # offset_id = id of the oldest message processed so far (0 = start from the newest)
+            offset_id = 0
+            remaining = limit
+            while remaining is None or remaining > 0:
+                page_size = self.scheduler.page_size if remaining is None else min(self.scheduler.page_size, remaining)
+                fetch_start = time.perf_counter()
+                messages = await self.scheduler.call(
+                    self.client.get_messages, entity, limit=page_size, offset_id=offset_id
+                )
+                FETCH_SECONDS.inc(time.perf_counter() - fetch_start, channel=channel_handle)
+                if not messages:
+                    break
+
+                # Download this page's photos concurrently (skipping ones already in the manifest)
+                image_paths = {}
+                downloads = []
+                for message in messages:
+                    if message.date and message.photo:
+                        entry = self.manifest.get(channel_handle, message.id)
+                        if entry is None:
+                            downloads.append((message, self._get_image_path(channel_handle, message.id)))
+                        else:
+                            image_paths[message.id] = entry['path']
+
+                started = time.perf_counter()
+                results = await self.scheduler.run_downloads([
+                    lambda m=message, p=img_save_path: self._download_photo(m, p, channel_handle)
+                    for message, img_save_path in downloads
+                ])
+                if downloads:
+                    download_seconds += time.perf_counter() - started
+                for (message, img_save_path), result in zip(downloads, results):
+                    if isinstance(result, Exception):
+                        logging.error(f"Failed to download photo {message.id} from {channel_handle}: {result}")
+                        continue
+                    download_bytes += result[0]
+                    image_paths[message.id] = img_save_path
+
+                for message in messages:
+                    offset_id = message.id
+                    if not message.date:
+                        continue
+
+                    msg_date_str = message.date.strftime('%Y-%m-%d')
+
+                    # Construct Data Object
+                    msg_data = {
+                        "message_id": message.id,
+                        "channel_name": channel_handle,
+                        "message_date": message.date.isoformat(),
+                        "message_text": message.text,
+                        "has_media": bool(message.media),
+                        "image_path": image_paths.get(message.id),
+                        "views": message.views if message.views else 0,
+                        "forwards": message.forwards if message.forwards else 0,
+                        "scraped_at": datetime.now().isoformat(),
+
+                    }
+
+                    # Group by date
+                    if msg_date_str not in data_by_date:
+                        data_by_date[msg_date_str] = []
+                    data_by_date[msg_date_str].append(msg_data)
+                    message_count += 1
+                    MESSAGES_TOTAL.inc(channel=channel_handle)
+
+                if remaining is not None:
+                    remaining -= len(messages)
+                # A short page means we reached the start of the channel
+                if len(messages) < page_size:
+                    break
 
-                msg_date_str = message.date.strftime('%Y-%m-%d')
-                
-                # extracting media
-                image_path = None
-                if message.photo:
-                    # Download image
-                    img_save_path = self._get_image_path(channel_handle, message.id)
-                    # Check if exists to skip re-downloading
-                    if not os.path.exists(img_save_path):
-                        await self.client.download_media(message.photo, img_save_path)
-                    image_path = img_save_path
-
-                # Construct Data Object
-                msg_data = {
-                    "message_id": message.id,
-                    "channel_name": channel_handle,
-                    "message_date": message.date.isoformat(),
-                    "message_text": message.text,
-                    "has_media": bool(message.media),
-                    "image_path": image_path,
-                    "views": message.views if message.views else 0,
-                    "forwards": message.forwards if message.forwards else 0,
-                    "scraped_at": datetime.now().isoformat(),
-
-                }
-
-                # Group by date
-                if msg_date_str not in data_by_date:
-                    data_by_date[msg_date_str] = []
-                data_by_date[msg_date_str].append(msg_data)
-
-            # Save Data to JSON files
-            self._save_data(data_by_date, channel_handle)
             logging.info(f"Finished scraping {channel_handle}")
 
         except Exception as e:
+            ERRORS_TOTAL.inc(channel=channel_handle)
             logging.error(f"Error scraping {channel_handle}: {str(e)}")
             print(f"Error: {e}")
 
-
+        # Save Data to JSON files (also after an error, so collected messages are not lost)
+        if data_by_date:
+            with SAVE_SECONDS.time(channel=channel_handle):
+                self._save_data(data_by_date, channel_handle)
+        if self._manifest is not None:
+            self._manifest.flush()
+
+        elapsed = time.perf_counter() - scrape_start
+        MESSAGES_PER_SECOND.set(round(message_count / elapsed, 2) if elapsed > 0 else 0, channel=channel_handle)
+        if download_seconds > 0:
+            DOWNLOAD_BYTES_PER_SECOND.set(round(download_bytes / download_seconds, 2), channel=channel_handle)
+        logging.info(
+            f"Saved {message_count} messages from {channel_handle} in {elapsed:.1f}s, "
+            f"{download_bytes} bytes downloaded in {download_seconds:.1f}s"
+        )
 
     def _save_data(self, data_by_date, channel_handle):
         """Saves grouped data to respective JSON files."""
@@ -140,4 +245,6 @@ class TelegramScraper:
                 json.dump(final_data, f, indent=4, ensure_ascii=False)
 
     def close(self):
+        if self._manifest is not None:
+            self._manifest.close()
         self.client.disconnect()
\ No newline at end of file
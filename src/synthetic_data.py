@@ -0,0 +1,175 @@
+# src/synthetic_data.py
+import os
+import json
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+from PIL import Image, ImageDraw
+
+
+# Vocabulary used to build fake product posts. Mixes product names, dosages and
+# the filler words the API's top-products query filters out.
+PRODUCTS = [
+    'paracetamol', 'amoxicillin', 'ibuprofen', 'omeprazole', 'metformin',
+    'cetirizine', 'vitamin', 'sunscreen', 'moisturizer', 'shampoo',
+    'glucometer', 'thermometer', 'bandage', 'syringe', 'inhaler',
+]
+DOSAGES = ['250mg', '500mg', '1g', '100ml', '50ml', '30 tablets', '10 capsules']
+FILLERS = ['price', 'please', 'contact', 'admin', 'available', 'delivery', 'original', 'stock']
+CHANNEL_TYPES = ['pharma', 'cosmetics', 'medical']
+
+# Synthetic message IDs start here, far above real Telegram message IDs, so synthetic rows can
+# never collide with (and overwrite) real ones -- raw.yolo_detections is keyed on message_id alone.
+SYNTHETIC_ID_BASE = 10 ** 12
+
+# Same category names ObjectDetector.classify_image produces
+IMAGE_CATEGORIES = ['promotional', 'product_display', 'lifestyle', 'other']
+CATEGORY_CLASSES = {
+    'promotional': [0, 39],
+    'product_display': [39, 73],
+    'lifestyle': [0],
+    'other': [],
+}
+
+
+class SyntheticDataGenerator:
+    def __init__(self, seed=42, raw_root='data/raw', start_date='2025-01-01', days=30):
+        """
+        Deterministic generator of fake scraper output.
+        The same seed always produces the same messages, images and detections.
+        :param raw_root: Data Lake root (mirrors the scraper's 'data/raw')
+        :param start_date: First day messages are spread over (YYYY-MM-DD)
+        :param days: Number of days messages are spread over
+        """
+        self.seed = seed
+        self.raw_root = raw_root
+        self.messages_path = os.path.join(raw_root, 'telegram_messages')
+        self.images_path = os.path.join(raw_root, 'images')
+        self.start_date = datetime.fromisoformat(start_date)
+        self.days = days
+
+    def channel_names(self, count):
+        """Synthetic channel handles, prefixed so they are easy to clean up."""
+        return [f"synthetic_{CHANNEL_TYPES[i % len(CHANNEL_TYPES)]}_{i:02d}" for i in range(count)]
+
+    def _message_text(self, rng):
+        words = [rng.choice(PRODUCTS), rng.choice(DOSAGES)]
+        words += rng.sample(FILLERS, k=rng.randint(1, 3))
+        words.append(f"{rng.randint(50, 5000)} ETB")
+        rng.shuffle(words)
+        return ' '.join(words)
+
+    def generate_messages(self, channels, messages_per_channel, photo_ratio=0.3):
+        """
+        Builds message dicts in the exact shape TelegramScraper.scrape_channel produces.
+        Message IDs are unique across channels and start at SYNTHETIC_ID_BASE.
+        :return: { channel_name: [msg1, msg2, ...], ... }
+        """
+        rng = random.Random(self.seed)
+        span_seconds = self.days * 24 * 3600
+        messages_by_channel = {}
+
+        for index, channel_name in enumerate(channels):
+            messages = []
+            for i in range(messages_per_channel):
+                message_id = SYNTHETIC_ID_BASE + index * 1_000_000 + i + 1
+                message_date = self.start_date + timedelta(seconds=rng.randrange(span_seconds))
+                has_photo = rng.random() < photo_ratio
+                image_path = None
+                if has_photo:
+                    image_path = os.path.join(self.images_path, channel_name, f"{message_id}.jpg")
+
+                messages.append({
+                    "message_id": message_id,
+                    "channel_name": channel_name,
+                    "message_date": message_date.isoformat(),
+                    "message_text": self._message_text(rng),
+                    "has_media": has_photo,
+                    "image_path": image_path,
+                    "views": rng.randint(0, 20000),
+                    "forwards": rng.randint(0, 500),
+                    "scraped_at": (self.start_date + timedelta(days=self.days)).isoformat(),
+                })
+            messages_by_channel[channel_name] = messages
+
+        return messages_by_channel
+
+    @staticmethod
+    def group_by_date(messages):
+        """Groups one channel's messages the way scrape_channel does before calling _save_data."""
+        data_by_date = {}
+        for msg in messages:
+            msg_date_str = msg['message_date'][:10]
+            if msg_date_str not in data_by_date:
+                data_by_date[msg_date_str] = []
+            data_by_date[msg_date_str].append(msg)
+        return data_by_date
+
+    def write_messages(self, messages_by_channel):
+        """Writes JSON files to data/raw/telegram_messages/YYYY-MM-DD/channel.json."""
+        written = 0
+        for channel_name, messages in messages_by_channel.items():
+            for date_str, day_messages in self.group_by_date(messages).items():
+                dir_path = os.path.join(self.messages_path, date_str)
+                os.makedirs(dir_path, exist_ok=True)
+                day_messages = sorted(day_messages, key=lambda x: x['message_id'])
+                with open(os.path.join(dir_path, f"{channel_name}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(day_messages, f, indent=4, ensure_ascii=False)
+                written += len(day_messages)
+        return written
+
+    def write_images(self, messages_by_channel, size=(64, 64)):
+        """
+        Writes a small JPEG for every photo message to data/raw/images/{channel}/{msg_id}.jpg.
+        Each image is a coloured background with a few rectangles so it is not trivially compressible.
+        """
+        rng = random.Random(self.seed)
+        written = 0
+        for messages in messages_by_channel.values():
+            for msg in messages:
+                if not msg['image_path']:
+                    continue
+                os.makedirs(os.path.dirname(msg['image_path']), exist_ok=True)
+
+                background = tuple(rng.randrange(256) for _ in range(3))
+                img = Image.new('RGB', size, background)
+                draw = ImageDraw.Draw(img)
+                for _ in range(rng.randint(1, 4)):
+                    x0, y0 = rng.randrange(size[0] // 2), rng.randrange(size[1] // 2)
+                    x1, y1 = x0 + rng.randint(4, size[0] // 2), y0 + rng.randint(4, size[1] // 2)
+                    fill = tuple(rng.randrange(256) for _ in range(3))
+                    draw.rectangle([x0, y0, x1, y1], fill=fill)
+                img.save(msg['image_path'], 'JPEG')
+                written += 1
+        return written
+
+    def generate_detections(self, messages_by_channel):
+        """
+        Builds a DataFrame in the shape ObjectDetector.process_images returns,
+        one row per photo message, without running the model.
+        """
+        rng = random.Random(self.seed)
+        records = []
+        for channel_name, messages in messages_by_channel.items():
+            for msg in messages:
+                if not msg['image_path']:
+                    continue
+                category = rng.choice(IMAGE_CATEGORIES)
+                classes = CATEGORY_CLASSES[category]
+                records.append({
+                    'message_id': str(msg['message_id']),
+                    'channel_name': channel_name,
+                    'image_path': msg['image_path'],
+                    'detected_objects': str(classes),
+                    'best_confidence': round(rng.uniform(0.3, 0.99), 4) if classes else 0.0,
+                    'image_category': category,
+                })
+        return pd.DataFrame(records)
+
+    def write_detections(self, messages_by_channel, csv_path):
+        """Writes the synthetic detections to CSV (same layout as data/processed/yolo_results.csv)."""
+        df = self.generate_detections(messages_by_channel)
+        os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+        df.to_csv(csv_path, index=False)
+        return len(df)
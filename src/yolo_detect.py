@@ -3,8 +3,11 @@ import torch
 from ultralytics import YOLO
 import pandas as pd
 import os
+import time
 from pathlib import Path
 
+from src.metrics import REGISTRY
+
 
 # --- PATCH START: Fix for PyTorch 2.6+ Security Error ---
 # PyTorch 2.6 defaults to weights_only=True, which breaks standard YOLO loading.
@@ -20,6 +23,12 @@ def strict_load_bypass(*args, **kwargs):
 torch.load = strict_load_bypass
 # --- PATCH END ---
 
+# Hot-path metrics (see src/metrics.py)
+INFERENCE_SECONDS = REGISTRY.histogram('detector_inference_seconds', 'YOLO inference latency per image')
+IMAGES_TOTAL = REGISTRY.counter('detector_images_total', 'Images classified', ['category'])
+ERRORS_TOTAL = REGISTRY.counter('detector_errors_total', 'Images that failed inference')
+DUPLICATES_TOTAL = REGISTRY.counter('detector_duplicates_total', 'Images reusing the result of an identical photo')
+
 
 class ObjectDetector:
     def __init__(self, model_path='yolov8n.pt'):
@@ -65,43 +74,63 @@ class ObjectDetector:
         else:
             return 'other'
 
-    def process_images(self, images_dir: str):
+    def process_images(self, images_dir: str, manifest=None):
         """
-        Scans the directory, runs inference, and returns a DataFrame of results.
+        Runs inference on every image and returns a DataFrame of results.
+        With a MediaManifest, images are enumerated from the index (no directory walk, only entries
+        under images_dir) and identical photos (same hash, e.g. forwarded between channels) are only
+        inferred once. Entries whose file has gone missing are removed from the manifest.
         """
         records = []
         
-        # Walk through the directory structure: data/raw/images/{channel}/{msg_id}.jpg
+        # (img_path, channel_name, message_id, file_hash)
         image_files = []
-        for root, _, files in os.walk(images_dir):
-            for file in files:
-                if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    image_files.append(os.path.join(root, file))
+        if manifest is not None:
+            images_root = os.path.join(os.path.abspath(images_dir), '')
+            for entry in manifest.iter_entries():
+                if not os.path.abspath(entry['path']).startswith(images_root):
+                    continue
+                image_files.append((entry['path'], entry['channel'], entry['message_id'], entry['hash']))
+        else:
+            # Walk through the directory structure: data/raw/images/{channel}/{msg_id}.jpg
+            for root, _, files in os.walk(images_dir):
+                for file in files:
+                    if file.lower().endswith(('.jpg', '.jpeg', '.png')):
+                        # Extract metadata from path
+                        # Path is usually: .../channel_name/message_id.jpg
+                        path_obj = Path(root, file)
+                        image_files.append((str(path_obj), path_obj.parent.name, path_obj.stem, None))
 
         print(f"Found {len(image_files)} images to process...")
 
+        # { file_hash: (detected_classes, best_conf) }
+        results_by_hash = {}
+
         # Process logic
-        for img_path in image_files:
+        for img_path, channel_name, message_id, file_hash in image_files:
             try:
-                # Extract metadata from path
-                # Path is usually: .../channel_name/message_id.jpg
-                path_obj = Path(img_path)
-                message_id = path_obj.stem # filename without extension
-                channel_name = path_obj.parent.name
-                
-                # Run Inference
-                # conf=0.5 means we only count things the AI is 50% sure about
-                results = self.model(img_path, verbose=False, conf=0.3)[0]
-                
-                # Extract detected class IDs
-                detected_classes = results.boxes.cls.cpu().numpy().astype(int).tolist()
-                
-                # Get max confidence score (if any objects detected)
-                conf_scores = results.boxes.conf.cpu().numpy()
-                best_conf = float(conf_scores.max()) if len(conf_scores) > 0 else 0.0
+                if file_hash in results_by_hash:
+                    detected_classes, best_conf = results_by_hash[file_hash]
+                    DUPLICATES_TOTAL.inc()
+                else:
+                    # Run Inference
+                    # conf=0.5 means we only count things the AI is 50% sure about
+                    inference_start = time.perf_counter()
+                    results = self.model(img_path, verbose=False, conf=0.3)[0]
+                    INFERENCE_SECONDS.observe(time.perf_counter() - inference_start)
+                    
+                    # Extract detected class IDs
+                    detected_classes = results.boxes.cls.cpu().numpy().astype(int).tolist()
+                    
+                    # Get max confidence score (if any objects detected)
+                    conf_scores = results.boxes.conf.cpu().numpy()
+                    best_conf = float(conf_scores.max()) if len(conf_scores) > 0 else 0.0
+                    if file_hash:
+                        results_by_hash[file_hash] = (detected_classes, best_conf)
                 
                 # Determine Category
                 category = self.classify_image(detected_classes)
+                IMAGES_TOTAL.inc(category=category)
                 
                 records.append({
                     'message_id': message_id,
@@ -113,7 +142,13 @@ class ObjectDetector:
                 })
                 
             except Exception as e:
+                ERRORS_TOTAL.inc()
                 print(f"Error processing {img_path}: {e}")
+                # Only checked on failure, so the happy path stays free of filesystem probes.
+                # Dropping the entry lets the next scrape download the photo again.
+                if manifest is not None and not os.path.exists(img_path):
+                    manifest.remove(channel_name, message_id)
+                    print(f"Removed missing image {img_path} from the manifest")
                 continue
 
         return pd.DataFrame(records)
\ No newline at end of file
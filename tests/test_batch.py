@@ -0,0 +1,59 @@
+from datetime import date
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from api import database
+from api.main import app
+
+
+class FakeSession:
+    """Answers each query based on the table it reads, recording the bound parameters."""
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, params=None):
+        sql = str(query)
+        self.executed.append((sql, params))
+        if 'fct_image_detections' in sql:
+            rows = [SimpleNamespace(channel_name='tikvahpharma', image_category='product_display', img_count=4, avg_confidence=0.61)]
+        elif 'regexp_split_to_table' in sql:
+            rows = [SimpleNamespace(term='paracetamol', frequency=12)]
+        else:
+            rows = [
+                SimpleNamespace(channel_name='tikvahpharma', date=date(2025, 1, 2), post_count=3),
+                SimpleNamespace(channel_name='tikvahpharma', date=date(2025, 1, 1), post_count=5),
+            ]
+        return SimpleNamespace(fetchall=lambda: rows)
+
+
+def test_batch_returns_all_reports_from_set_based_queries():
+    session = FakeSession()
+    app.dependency_overrides[database.get_db] = lambda: session
+    try:
+        response = TestClient(app).post('/api/batch', json={
+            'channels': ['tikvahpharma', 'CheMed123', 'tikvahpharma'],
+            'reports': ['activity', 'visual-content', 'top-products'],
+        })
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['activity'] == {
+        'tikvahpharma': [{'date': '2025-01-02', 'post_count': 3}, {'date': '2025-01-01', 'post_count': 5}],
+        'CheMed123': [],
+    }
+    assert body['visual_content']['tikvahpharma'][0] == {'image_category': 'product_display', 'count': 4, 'avg_confidence': 0.61}
+    assert body['top_products'] == [{'term': 'paracetamol', 'count': 12}]
+
+    # One query per report type, channels deduplicated and bound as a single array
+    assert len(session.executed) == 3
+    assert 'ANY(:channels)' in session.executed[0][0]
+    assert session.executed[0][1] == {'channels': ['tikvahpharma', 'CheMed123']}
+
+
+def test_batch_rejects_unknown_report():
+    response = TestClient(app).post('/api/batch', json={'channels': ['x'], 'reports': ['everything']})
+    assert response.status_code == 422
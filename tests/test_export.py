@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from api import export
+from api.main import app
+
+
+@pytest.fixture
+def marts_engine(tmp_path, monkeypatch):
+    """SQLite stand-in for the dbt marts: 'public_marts' is an attached database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def attach_marts(dbapi_connection, _):
+        dbapi_connection.execute(f"ATTACH DATABASE '{tmp_path / 'marts.db'}' AS public_marts")
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE public_marts.dim_channels (channel_key TEXT, channel_name TEXT)"))
+        connection.execute(text("CREATE TABLE public_marts.dim_dates (date_key INT, full_date DATE)"))
+        connection.execute(text("""
+            CREATE TABLE public_marts.fct_messages (
+                message_id INT, channel_key TEXT, date_key INT, message_date TIMESTAMP, message_text TEXT,
+                message_length INT, has_media BOOLEAN, view_count INT, forward_count INT
+            )
+        """))
+        connection.execute(text("""
+            CREATE TABLE public_marts.fct_image_detections (
+                message_id INT, channel_key TEXT, date_key INT, image_category TEXT,
+                confidence_score REAL, detected_objects TEXT
+            )
+        """))
+        connection.execute(text("""
+            INSERT INTO public_marts.dim_channels VALUES ('k1', 'tikvahpharma'), ('k2', 'CheMed123')
+        """))
+        connection.execute(text("INSERT INTO public_marts.dim_dates VALUES (20250101, '2025-01-01')"))
+        for message_id in range(1, 6):
+            for channel_key in ('k1', 'k2'):
+                connection.execute(text("""
+                    INSERT INTO public_marts.fct_messages
+                    VALUES (:id, :key, 20250101, :ts, 'paracetamol, 500mg', 18, 0, 10, 1)
+                """), {"id": message_id, "key": channel_key, "ts": f"2025-01-0{message_id} 10:00:00"})
+                if message_id <= 2:
+                    # The same message_id in two channels: only (message_id, channel_key) is unique
+                    connection.execute(text("""
+                        INSERT INTO public_marts.fct_image_detections
+                        VALUES (:id, :key, 20250101, 'promotional', 0.9, '[0, 39]')
+                    """), {"id": message_id, "key": channel_key})
+
+    monkeypatch.setattr(export.database, "engine", engine)
+    return engine
+
+
+def test_build_export_query_filters_and_keyset():
+    query, params = export.build_export_query(
+        "messages", channel="tikvahpharma", start_date=date(2025, 1, 1), end_date=date(2025, 1, 31),
+        after_id=100, after_channel_key="k2", limit=50
+    )
+    sql = str(query)
+    assert "c.channel_name = :channel" in sql
+    assert "(f.message_id, f.channel_key) > (:after_id, :after_channel_key)" in sql
+    assert sql.rstrip().endswith("ORDER BY f.message_id, f.channel_key LIMIT :limit")
+    assert params["end_date"] == date(2025, 2, 1)
+
+    query, params = export.build_export_query("detections", after_id=7, after_channel_key="k2")
+    assert "(i.message_id, i.channel_key) > (:after_id, :after_channel_key)" in str(query)
+    assert str(query).rstrip().endswith("ORDER BY i.message_id, i.channel_key")
+
+    # after_id alone resumes at the next message_id
+    query, params = export.build_export_query("messages", after_id=7)
+    assert "f.message_id > :after_id" in str(query)
+    assert "after_channel_key" not in params and "LIMIT" not in str(query)
+
+
+def test_export_messages_ndjson_resumes_from_keyset(marts_engine):
+    client = TestClient(app)
+    response = client.get("/api/export/messages", params={"after_id": 3, "after_channel_key": "k1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["message_id"], row["channel_key"]) for row in rows] == [
+        (3, "k2"), (4, "k1"), (4, "k2"), (5, "k1"), (5, "k2"),
+    ]
+    assert rows[0]["channel_name"] == "CheMed123"
+
+
+def test_export_messages_csv_with_filters(marts_engine):
+    client = TestClient(app)
+    response = client.get("/api/export/messages", params={
+        "format": "csv", "channel": "tikvahpharma", "start_date": "2025-01-02", "end_date": "2025-01-03",
+    })
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == export.DATASETS["messages"]["columns"]
+    assert [row[0] for row in rows[1:]] == ["2", "3"]
+    assert rows[1][4] == "paracetamol, 500mg"
+
+
+def test_export_rejects_unknown_format():
+    client = TestClient(app)
+    assert client.get("/api/export/messages", params={"format": "xml"}).status_code == 422
+
+
+def test_export_detections_resumes_within_message_id(marts_engine):
+    client = TestClient(app)
+    response = client.get("/api/export/detections", params={"after_id": 1, "after_channel_key": "k1"})
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["message_id"], row["channel_key"], row["channel_name"]) for row in rows] == [
+        (1, "k2", "CheMed123"), (2, "k1", "tikvahpharma"), (2, "k2", "CheMed123"),
+    ]
+
+
+def test_export_lone_after_id_skips_to_next_message(marts_engine):
+    client = TestClient(app)
+    rows = [json.loads(line) for line in client.get("/api/export/detections", params={"after_id": 1}).text.splitlines()]
+    assert [row["message_id"] for row in rows] == [2, 2]
+
+    assert client.get("/api/export/messages", params={"after_channel_key": "k2"}).status_code == 422
+
+
+def test_export_database_error_is_not_a_200(tmp_path, monkeypatch):
+    # No marts attached: the query fails before any response is sent
+    monkeypatch.setattr(export.database, "engine", create_engine(f"sqlite:///{tmp_path / 'empty.db'}"))
+    client = TestClient(app, raise_server_exceptions=False)
+
+    response = client.get("/api/export/messages", params={"format": "csv"})
+    assert response.status_code == 500
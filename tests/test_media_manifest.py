@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from src.media_manifest import MediaManifest
+from src.request_scheduler import RequestScheduler
+from src.scraper import TelegramScraper
+
+
+def test_entries_persist_across_reopen(tmp_path):
+    db_path = str(tmp_path / 'manifest.sqlite3')
+    manifest = MediaManifest(db_path, images_dir=None)
+    manifest.add('tikvahpharma', 10, 'data/raw/images/tikvahpharma/10.jpg', data=b'photo-a')
+    manifest.add('CheMed123', 99, 'data/raw/images/CheMed123/99.jpg', data=b'photo-a')
+    manifest.add('CheMed123', 100, 'data/raw/images/CheMed123/100.jpg', data=b'photo-b')
+    manifest.close()
+
+    reopened = MediaManifest(db_path, images_dir=None)
+    assert len(reopened) == 3
+    assert ('tikvahpharma', 10) in reopened
+    assert reopened.get('CheMed123', 100)['size'] == len(b'photo-b')
+
+    # The same photo forwarded between channels shares a hash
+    duplicates = list(reopened.duplicates().values())
+    assert len(duplicates) == 1
+    assert {entry['channel'] for entry in duplicates[0]} == {'tikvahpharma', 'CheMed123'}
+
+
+def test_new_manifest_bootstraps_from_images_dir(tmp_path):
+    channel_dir = tmp_path / 'images' / 'tikvahpharma'
+    channel_dir.mkdir(parents=True)
+    (channel_dir / '1.jpg').write_bytes(b'one')
+    (channel_dir / '2.jpg').write_bytes(b'two')
+    (channel_dir / 'notes.txt').write_bytes(b'ignored')
+
+    manifest = MediaManifest(str(tmp_path / 'manifest.sqlite3'), images_dir=str(tmp_path / 'images'))
+    assert sorted(entry['message_id'] for entry in manifest.iter_entries('tikvahpharma')) == [1, 2]
+
+
+def test_paths_stored_relative_to_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = MediaManifest(images_dir=None)
+    manifest.add('tikvahpharma', 1, 'data/raw/images/tikvahpharma/1.jpg', data=b'one')
+    manifest.add('tikvahpharma', 2, str(tmp_path / 'data' / 'raw' / 'images' / 'tikvahpharma' / '2.jpg'), data=b'two')
+    manifest.close()
+
+    # Scraper (cwd-relative) and detect_objects.py (absolute) paths end up in the same form
+    stored = MediaManifest(images_dir=None).conn.execute("SELECT path FROM media ORDER BY message_id").fetchall()
+    assert stored == [('images/tikvahpharma/1.jpg',), ('images/tikvahpharma/2.jpg',)]
+
+    absolute = MediaManifest(str(tmp_path / 'data' / 'raw' / 'media_manifest.sqlite3'), images_dir=None)
+    assert absolute.get('tikvahpharma', 1)['path'] == str(tmp_path / 'data' / 'raw' / 'images' / 'tikvahpharma' / '1.jpg')
+
+
+def test_remove_and_rebuild(tmp_path):
+    channel_dir = tmp_path / 'images' / 'tikvahpharma'
+    channel_dir.mkdir(parents=True)
+    (channel_dir / '1.jpg').write_bytes(b'one')
+    (channel_dir / '2.jpg').write_bytes(b'one')
+    db_path = str(tmp_path / 'manifest.sqlite3')
+
+    manifest = MediaManifest(db_path, images_dir=str(tmp_path / 'images'))
+    assert manifest.remove('tikvahpharma', 1)['message_id'] == 1
+    assert manifest.remove('tikvahpharma', 1) is None
+    assert list(manifest.duplicates()) == []
+    manifest.close()
+    assert ('tikvahpharma', 1) not in MediaManifest(db_path, images_dir=None)
+
+    # A file deleted by hand disappears on rebuild, the restored one comes back
+    (channel_dir / '2.jpg').unlink()
+    manifest = MediaManifest(db_path, images_dir=None)
+    assert manifest.rebuild(str(tmp_path / 'images')) == 1
+    manifest.close()
+    assert sorted(key for key in MediaManifest(db_path, images_dir=None).entries) == [('tikvahpharma', 1)]
+
+
+def test_scraper_opens_manifest_lazily(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def construct():
+        scraper = TelegramScraper(1, 'test', None)
+        scraper.close()
+
+    asyncio.run(construct())
+    assert not (tmp_path / 'data' / 'raw' / 'media_manifest.sqlite3').exists()
+
+
+class PhotoClient:
+    def __init__(self, messages):
+        self.messages = messages
+        self.downloads = []
+
+    async def get_entity(self, handle):
+        return handle
+
+    async def get_messages(self, entity, limit, offset_id=0):
+        return [m for m in self.messages if offset_id == 0 or m.id < offset_id][:limit]
+
+    async def download_media(self, media, file=None):
+        self.downloads.append(media)
+        return f"bytes-of-{media}".encode()
+
+
+def test_scraper_downloads_only_photos_missing_from_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    messages = [
+        SimpleNamespace(
+            id=i, date=datetime(2025, 1, 1, tzinfo=timezone.utc), text='', media=True,
+            photo=f"photo{i}", views=0, forwards=0,
+        )
+        for i in (3, 2, 1)
+    ]
+
+    async def scrape():
+        manifest = MediaManifest(images_dir=None)
+        manifest.add('tikvahpharma', 2, 'data/raw/images/tikvahpharma/2.jpg', data=b'old')
+        scraper = TelegramScraper(1, 'test', None, scheduler=RequestScheduler(requests_per_second=1000), manifest=manifest)
+        scraper.client = PhotoClient(messages)
+        await scraper.scrape_channel('tikvahpharma', limit=None)
+        return scraper
+
+    scraper = asyncio.run(scrape())
+    assert scraper.client.downloads == ['photo3', 'photo1']
+    assert (tmp_path / 'data' / 'raw' / 'images' / 'tikvahpharma' / '3.jpg').read_bytes() == b'bytes-of-photo3'
+    assert len(MediaManifest(images_dir=None)) == 3
@@ -0,0 +1,70 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from src.metrics import MetricsRegistry, REGISTRY
+from api.main import app
+
+
+def test_counter_and_histogram_render_prometheus():
+    registry = MetricsRegistry()
+    messages = registry.counter('scraper_messages_total', 'Messages scraped', ['channel'])
+    latency = registry.histogram('detector_inference_seconds', 'Inference latency', buckets=(0.1, 1.0))
+
+    messages.inc(channel='tikvahpharma')
+    messages.inc(2, channel='tikvahpharma')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    output = registry.render_prometheus()
+    assert '# TYPE scraper_messages_total counter' in output
+    assert 'scraper_messages_total{channel="tikvahpharma"} 3' in output
+    assert 'detector_inference_seconds_bucket{le="0.1"} 1' in output
+    assert 'detector_inference_seconds_bucket{le="1.0"} 2' in output
+    assert 'detector_inference_seconds_bucket{le="+Inf"} 3' in output
+    assert 'detector_inference_seconds_count 3' in output
+
+
+def test_registering_twice_returns_same_metric():
+    registry = MetricsRegistry()
+    first = registry.counter('loader_rows_total', 'Rows', ['table'])
+    assert registry.counter('loader_rows_total', 'Rows', ['table']) is first
+
+
+def test_write_run_file(tmp_path):
+    registry = MetricsRegistry()
+    registry.gauge('loader_rows_per_second', 'Rows/sec', ['table']).set(1200.5, table='telegram_messages')
+
+    file_path = registry.write_run_file('load_raw', directory=str(tmp_path))
+    with open(file_path, encoding='utf-8') as f:
+        report = json.load(f)
+
+    assert report['stage'] == 'load_raw'
+    values = report['metrics']['loader_rows_per_second']['values']
+    assert values == [{'labels': {'table': 'telegram_messages'}, 'value': 1200.5}]
+
+
+def test_metrics_endpoint_records_requests():
+    client = TestClient(app)
+    client.get('/')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'api_request_seconds_count{endpoint="/",status="200"}' in response.text
+    assert REGISTRY.snapshot()['api_request_seconds']['values']
+
+
+def test_failed_requests_are_recorded_as_500():
+    @app.get('/_boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    try:
+        response = TestClient(app, raise_server_exceptions=False).get('/_boom')
+    finally:
+        app.router.routes = [route for route in app.router.routes if getattr(route, 'path', None) != '/_boom']
+
+    assert response.status_code == 500
+    assert 'api_request_seconds_count{endpoint="/_boom",status="500"} 1' in REGISTRY.render_prometheus()
@@ -0,0 +1,199 @@
+import json
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from src import request_scheduler
+from src.request_scheduler import RequestScheduler, FloodWaitExceeded
+from src.scraper import TelegramScraper
+
+
+@pytest.fixture
+def slept(monkeypatch):
+    """
+    Replaces asyncio.sleep and the clock in the scheduler so flood waits do not slow the tests down.
+    Sleeps still yield to the event loop, and concurrent sleeps overlap on the fake clock.
+    """
+    calls = []
+    clock = [1000.0]
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(seconds):
+        calls.append(seconds)
+        wake_at = clock[0] + seconds
+        await real_sleep(0)
+        clock[0] = max(clock[0], wake_at)
+
+    monkeypatch.setattr(request_scheduler.asyncio, 'sleep', fake_sleep)
+    monkeypatch.setattr(request_scheduler, 'time', SimpleNamespace(monotonic=lambda: clock[0]))
+    return calls
+
+
+def make_message(message_id):
+    return SimpleNamespace(
+        id=message_id,
+        date=datetime(2025, 1, 1 + message_id % 3, tzinfo=timezone.utc),
+        text=f"message {message_id}",
+        media=None,
+        photo=None,
+        views=10,
+        forwards=1,
+    )
+
+
+class FakeClient:
+    """Serves a channel of 'total' messages newest first, raising one flood wait on the given call."""
+
+    def __init__(self, total, flood_on_call=None, flood_seconds=5):
+        self.messages = [make_message(i) for i in range(total, 0, -1)]
+        self.flood_on_call = flood_on_call
+        self.flood_seconds = flood_seconds
+        self.calls = []
+
+    async def get_entity(self, handle):
+        return handle
+
+    async def get_messages(self, entity, limit, offset_id=0):
+        self.calls.append((limit, offset_id))
+        if len(self.calls) == self.flood_on_call:
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+        older = [m for m in self.messages if offset_id == 0 or m.id < offset_id]
+        return older[:limit]
+
+
+def test_flood_wait_is_honoured_and_backs_off(slept):
+    scheduler = RequestScheduler(requests_per_second=1000, page_size=100, download_concurrency=4)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FloodWaitError(request=None, capture=7)
+        return 'ok'
+
+    assert asyncio.run(scheduler.call(flaky)) == 'ok'
+    assert len(attempts) == 2
+    assert 8 in slept
+    assert scheduler.page_size == 50
+    # An API flood wait does not touch the download side
+    assert scheduler.download_concurrency == 4
+
+
+def test_bucket_stays_empty_through_flood_wait(slept):
+    scheduler = RequestScheduler(requests_per_second=2, burst=5)
+    bucket = scheduler.buckets['api']
+    scheduler._on_flood_wait(3, 'api')
+
+    async def sleep_then_acquire():
+        # call() sleeps through the flood wait before acquiring again
+        await asyncio.sleep(4)
+        return [await bucket.acquire() for _ in range(3)]
+
+    # Refilled at the halved rate (1/s) from the end of the wait, not with a full burst
+    assert bucket.rate == 1
+    assert asyncio.run(sleep_then_acquire()) == [pytest.approx(1.0)] * 3
+
+
+def test_long_flood_wait_raises(slept):
+    scheduler = RequestScheduler(requests_per_second=1000, max_flood_wait=60)
+
+    async def banned():
+        raise FloodWaitError(request=None, capture=3600)
+
+    with pytest.raises(FloodWaitExceeded):
+        asyncio.run(scheduler.call(banned))
+
+
+def test_exhausted_retries_report_last_wait(slept):
+    scheduler = RequestScheduler(requests_per_second=1000, max_flood_wait=60, max_retries=2)
+
+    async def throttled():
+        raise FloodWaitError(request=None, capture=7)
+
+    with pytest.raises(FloodWaitExceeded) as excinfo:
+        asyncio.run(scheduler.call(throttled))
+    assert excinfo.value.seconds == 7
+    assert excinfo.value.attempts == 3
+    assert slept.count(8) == 3
+
+
+class BatchFloodClient:
+    """Every photo download raises one flood wait before succeeding, like a batch hitting the limit together."""
+
+    def __init__(self, photos):
+        self.messages = [
+            SimpleNamespace(
+                id=i, date=datetime(2025, 1, 1, tzinfo=timezone.utc), text='', media=True,
+                photo=f"photo{i}", views=0, forwards=0,
+            )
+            for i in range(photos, 0, -1)
+        ]
+        self.attempts = {}
+
+    async def get_entity(self, handle):
+        return handle
+
+    async def get_messages(self, entity, limit, offset_id=0):
+        return [m for m in self.messages if offset_id == 0 or m.id < offset_id][:limit]
+
+    async def download_media(self, media, file=None):
+        self.attempts[media] = self.attempts.get(media, 0) + 1
+        # In flight together with the rest of the batch, like a real network call
+        await asyncio.sleep(0)
+        if self.attempts[media] == 1:
+            raise FloodWaitError(request=None, capture=3)
+        return f"bytes-of-{media}".encode()
+
+
+def test_download_batch_flood_backs_off_once(slept, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scheduler = RequestScheduler(requests_per_second=1000, downloads_per_second=1000, download_concurrency=4)
+    flood_waits = request_scheduler.FLOOD_WAITS_TOTAL.value(kind='download')
+    scraper = asyncio.run(run_scrape(scheduler, BatchFloodClient(photos=4)))
+
+    assert scraper.client.attempts == {f"photo{i}": 2 for i in range(1, 5)}
+    assert request_scheduler.FLOOD_WAITS_TOTAL.value(kind='download') - flood_waits == 4
+    # One step down for the whole batch, and only on the download side
+    assert scheduler.download_concurrency == 2
+    assert scheduler.page_size == 100
+    assert scheduler.buckets['download'].rate == 500
+    assert len(scraper.manifest) == 4
+
+
+async def run_scrape(scheduler, client):
+    # TelegramClient needs a running event loop to be constructed
+    scraper = TelegramScraper(1, 'test', None, scheduler=scheduler)
+    scraper.client = client
+    await scraper.scrape_channel('tikvahpharma', limit=None)
+    return scraper
+
+
+def test_scrape_resumes_after_flood_wait(slept, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scraper = asyncio.run(run_scrape(
+        RequestScheduler(requests_per_second=1000, page_size=40, min_page_size=10), FakeClient(total=100, flood_on_call=2)
+    ))
+
+    # Second page failed and was retried from the same offset; later pages are smaller
+    assert scraper.client.calls[1] == scraper.client.calls[2] == (40, 61)
+    assert scraper.client.calls[3] == (20, 21)
+
+    saved = []
+    for json_file in (tmp_path / 'data' / 'raw' / 'telegram_messages').rglob('tikvahpharma.json'):
+        saved.extend(json.loads(json_file.read_text(encoding='utf-8')))
+    assert sorted(msg['message_id'] for msg in saved) == list(range(1, 101))
+
+
+def test_scrape_keeps_collected_data_when_aborted(slept, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(run_scrape(
+        RequestScheduler(requests_per_second=1000, page_size=40, max_flood_wait=60), FakeClient(total=100, flood_on_call=2, flood_seconds=3600)
+    ))
+
+    saved = []
+    for json_file in (tmp_path / 'data' / 'raw' / 'telegram_messages').rglob('tikvahpharma.json'):
+        saved.extend(json.loads(json_file.read_text(encoding='utf-8')))
+    assert len(saved) == 40
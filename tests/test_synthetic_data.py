@@ -0,0 +1,46 @@
+import os
+import json
+
+from src.synthetic_data import SyntheticDataGenerator, SYNTHETIC_ID_BASE
+
+
+def test_generation_is_deterministic(tmp_path):
+    first = SyntheticDataGenerator(seed=7, raw_root=str(tmp_path))
+    second = SyntheticDataGenerator(seed=7, raw_root=str(tmp_path))
+    channels = first.channel_names(2)
+
+    assert first.generate_messages(channels, 50) == second.generate_messages(channels, 50)
+
+
+def test_message_ids_unique_and_reserved(tmp_path):
+    generator = SyntheticDataGenerator(raw_root=str(tmp_path))
+    messages_by_channel = generator.generate_messages(generator.channel_names(3), 100)
+
+    ids = [msg['message_id'] for messages in messages_by_channel.values() for msg in messages]
+    assert len(ids) == len(set(ids)) == 300
+    assert min(ids) > SYNTHETIC_ID_BASE
+
+
+def test_writes_scraper_layout(tmp_path):
+    generator = SyntheticDataGenerator(raw_root=str(tmp_path), days=3)
+    channels = generator.channel_names(2)
+    messages_by_channel = generator.generate_messages(channels, 40, photo_ratio=0.5)
+
+    assert generator.write_messages(messages_by_channel) == 80
+    date_dirs = os.listdir(tmp_path / 'telegram_messages')
+    assert 1 <= len(date_dirs) <= 3
+    with open(tmp_path / 'telegram_messages' / date_dirs[0] / f"{channels[0]}.json", encoding='utf-8') as f:
+        saved = json.load(f)
+    assert set(saved[0]) == {
+        'message_id', 'channel_name', 'message_date', 'message_text', 'has_media',
+        'image_path', 'views', 'forwards', 'scraped_at',
+    }
+
+    photos = [msg for messages in messages_by_channel.values() for msg in messages if msg['image_path']]
+    assert generator.write_images(messages_by_channel) == len(photos)
+    assert all(os.path.exists(msg['image_path']) for msg in photos)
+    assert os.path.dirname(photos[0]['image_path']).startswith(str(tmp_path / 'images'))
+
+    df = generator.generate_detections(messages_by_channel)
+    assert len(df) == len(photos)
+    assert set(df['image_category']) <= {'promotional', 'product_display', 'lifestyle', 'other'}
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip('ultralytics')
+
+from src import yolo_detect
+from src.media_manifest import MediaManifest
+
+
+def tensor(values):
+    """Mimics the .cpu().numpy() chain of a torch tensor."""
+    return SimpleNamespace(cpu=lambda: SimpleNamespace(numpy=lambda: np.array(values)))
+
+
+class FakeYOLO:
+    """Stands in for ultralytics.YOLO: detects a person and a bottle in every image it can open."""
+
+    def __init__(self, model_path):
+        self.calls = []
+
+    def __call__(self, img_path, verbose=False, conf=0.3):
+        self.calls.append(img_path)
+        with open(img_path, 'rb'):
+            pass
+        return [SimpleNamespace(boxes=SimpleNamespace(cls=tensor([0, 39]), conf=tensor([0.9, 0.6])))]
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setattr(yolo_detect, 'YOLO', FakeYOLO)
+    return yolo_detect.ObjectDetector()
+
+
+def test_process_images_from_manifest(detector, tmp_path):
+    images_dir = tmp_path / 'images'
+    for channel, message_id, data in (('tikvahpharma', 1, b'same'), ('CheMed123', 7, b'same'), ('CheMed123', 8, b'other')):
+        (images_dir / channel).mkdir(parents=True, exist_ok=True)
+        (images_dir / channel / f"{message_id}.jpg").write_bytes(data)
+    manifest = MediaManifest(str(tmp_path / 'manifest.sqlite3'), images_dir=str(images_dir))
+    # Indexed but deleted since, and an entry outside images_dir
+    manifest.add('CheMed123', 9, str(images_dir / 'CheMed123' / '9.jpg'), data=b'gone')
+    manifest.add('elsewhere', 1, str(tmp_path / 'other' / '1.jpg'), data=b'elsewhere')
+
+    df = detector.process_images(str(images_dir), manifest=manifest)
+
+    assert sorted(zip(df['channel_name'], df['message_id'])) == [('CheMed123', 7), ('CheMed123', 8), ('tikvahpharma', 1)]
+    assert set(df['image_category']) == {'promotional'}
+    # Identical photos are inferred once; the missing file was tried and dropped from the manifest
+    assert len(detector.model.calls) == 3
+    assert str(images_dir / 'CheMed123' / '9.jpg') in detector.model.calls
+    assert ('CheMed123', 9) not in manifest
+    assert ('elsewhere', 1) in manifest